@@ -5,151 +5,450 @@ Sistema CRUD simples para um banco SQLite com menu interativo.
 """
 
 import sqlite3
-import os
+import atexit
 import csv
-import shutil
-from datetime import datetime
+import functools
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
 
 DB_FILENAME = "app_database.db"
 
+_CONN = None
+_in_bulk = False  # modo lote: commits adiados até flush_bulk()
+# Estratégia de busca escolhida em initialize_db_on conforme o que o SQLite suporta:
+# "fts" (FTS5 trigram), "blob" (coluna gerada search_blob) ou "like" (LIKE nas quatro colunas).
+_SEARCH_MODE = "fts"
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",      # 64 MB
+    "PRAGMA mmap_size=268435456",    # 256 MB
+    "PRAGMA foreign_keys=ON",
+)
+
 # ---------- Inicialização do banco ----------
 def get_connection(db_filename=DB_FILENAME):
-    return sqlite3.connect(db_filename)
+    conn = sqlite3.connect(db_filename, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _conn():
+    """Conexão única do processo, aberta (e com o schema criado) no primeiro uso."""
+    global _CONN
+    if _CONN is None:
+        # Só guarda a conexão depois de PRAGMAs e schema aplicados: se falharem
+        # (ex.: "database is locked"), a próxima chamada tenta de novo do zero.
+        conn = get_connection()
+        try:
+            apply_pragmas(conn)
+            initialize_db_on(conn)
+        except Exception:
+            conn.close()
+            raise
+        _CONN = conn
+    return _CONN
+
+def apply_pragmas(conn):
+    """WAL + cache/temp em memória; chamado uma vez, ao abrir a conexão do processo."""
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+def _close_conn():
+    global _CONN
+    if _CONN is not None:
+        if _in_bulk:
+            _CONN.commit()  # não perde um lote aberto ao sair
+        _CONN.close()
+        _CONN = None
+
+atexit.register(_close_conn)
 
 def initialize_db():
-    """Cria a tabela 'contacts' caso não exista."""
-    conn = get_connection()
-    cur = conn.cursor()
+    """Cria a tabela 'contacts' caso não exista (feito por _conn() ao abrir a conexão)."""
+    _conn()
+
+CONTACTS_COLUMNS = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    notes TEXT,
+    created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+"""
+
+def _contacts_needs_rebuild(cur):
+    """True se 'contacts' foi criada por uma versão antiga (created_at TEXT ou sem DEFAULT)."""
+    cur.execute("PRAGMA table_info(contacts)")
+    for _cid, col_name, col_type, _notnull, default, _pk in cur.fetchall():
+        if col_name == "created_at":
+            return default is None or col_type.upper() != "INTEGER"
+    return False
+
+def _rebuild_contacts_table(cur):
+    """Recria 'contacts' com o schema atual preservando ids e a sequência do AUTOINCREMENT.
+    (SQLite não permite alterar tipo/DEFAULT de uma coluna existente.)
+    Datas ISO antigas viram segundos UNIX (UTC)."""
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'contacts'")
+    seq = cur.fetchone()
+    cur.execute("BEGIN")
+    cur.execute(f"CREATE TABLE contacts_new ({CONTACTS_COLUMNS})")
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS contacts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT,
-            phone TEXT,
-            notes TEXT,
-            created_at TEXT NOT NULL
-        );
+        INSERT INTO contacts_new (id, name, email, phone, notes, created_at)
+        SELECT id, name, email, phone, notes,
+               CASE WHEN typeof(created_at) = 'integer' THEN created_at
+                    ELSE COALESCE(CAST(strftime('%s', created_at) AS INTEGER),
+                                  CAST(strftime('%s', 'now') AS INTEGER))
+               END
+        FROM contacts
     """)
+    # Índices e triggers antigos somem com o DROP e são recriados logo abaixo.
+    cur.execute("DROP TABLE contacts")
+    cur.execute("ALTER TABLE contacts_new RENAME TO contacts")
+    if seq is not None:
+        cur.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'contacts'", (seq[0],))
+    cur.connection.commit()
+
+def initialize_db_on(conn):
+    global _SEARCH_MODE
+    cur = conn.cursor()
+    cur.execute(f"CREATE TABLE IF NOT EXISTS contacts ({CONTACTS_COLUMNS})")
+    if _contacts_needs_rebuild(cur):
+        _rebuild_contacts_table(cur)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_contacts_phone ON contacts(phone)")
+    # Índice de texto completo (FTS5) espelhando 'contacts' via triggers.
+    # Tokenizer trigram: MATCH encontra qualquer substring (mesmo resultado do LIKE '%termo%').
+    cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'")
+    fts_row = cur.fetchone()
+    if fts_row is not None and "trigram" not in fts_row[0]:
+        # Índice antigo (unicode61, só palavras inteiras): recria com trigram.
+        cur.execute("DROP TABLE contacts_fts")
+        fts_row = None
+    fts_exists = fts_row is not None
+    try:
+        cur.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+                name, email, phone, notes,
+                content='contacts', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # Sem FTS5: cai para uma coluna gerada única pesquisada com um só LIKE.
+        try:
+            _add_search_blob(cur)
+            _SEARCH_MODE = "blob"
+        except sqlite3.OperationalError:
+            # Colunas geradas exigem SQLite >= 3.31: mantém o LIKE nas quatro colunas.
+            _SEARCH_MODE = "like"
+        conn.commit()
+        return
+    _SEARCH_MODE = "fts"
+    cur.executescript("""
+        CREATE TRIGGER IF NOT EXISTS contacts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, name, email, phone, notes)
+            VALUES (new.id, new.name, new.email, new.phone, new.notes);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, name, email, phone, notes)
+            VALUES ('delete', old.id, old.name, old.email, old.phone, old.notes);
+        END;
+        CREATE TRIGGER IF NOT EXISTS contacts_au AFTER UPDATE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, name, email, phone, notes)
+            VALUES ('delete', old.id, old.name, old.email, old.phone, old.notes);
+            INSERT INTO contacts_fts(rowid, name, email, phone, notes)
+            VALUES (new.id, new.name, new.email, new.phone, new.notes);
+        END;
+    """)
+    if not fts_exists:
+        # Migração única: indexa contatos já existentes em bancos antigos.
+        cur.execute("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
     conn.commit()
-    conn.close()
+
+def _add_search_blob(cur):
+    """Adiciona a coluna gerada 'search_blob' (campos concatenados em minúsculas), se faltar."""
+    cur.execute("PRAGMA table_xinfo(contacts)")
+    if any(col[1] == "search_blob" for col in cur.fetchall()):
+        return
+    cur.execute("""
+        ALTER TABLE contacts ADD COLUMN search_blob TEXT GENERATED ALWAYS AS (
+            lower(coalesce(name, '') || ' ' || coalesce(email, '') || ' ' ||
+                  coalesce(phone, '') || ' ' || coalesce(notes, ''))
+        ) VIRTUAL
+    """)
 
 # ---------- Operações CRUD ----------
+def _commit(conn):
+    """Confirma a escrita, exceto no modo lote (o commit fica para flush_bulk())."""
+    if not _in_bulk:
+        conn.commit()
+
+def begin_bulk():
+    """Abre uma transação única para as próximas escritas (um fsync no flush)."""
+    global _in_bulk
+    if _in_bulk:
+        return
+    conn = _conn()
+    if not conn.in_transaction:  # uma transação já aberta passa a ser o lote
+        conn.execute("BEGIN DEFERRED")
+    _in_bulk = True
+
+def flush_bulk():
+    """Confirma o lote aberto por begin_bulk() e volta ao commit por operação."""
+    global _in_bulk
+    if not _in_bulk:
+        return
+    _conn().commit()
+    _in_bulk = False
+
+ANALYZE_THRESHOLD = 1000  # lotes a partir deste tamanho atualizam as estatísticas do planner
+
+# created_at vem do DEFAULT da coluna.
+INSERT_CONTACT_SQL = """
+    INSERT INTO contacts (name, email, phone, notes)
+    VALUES (?, ?, ?, ?)
+"""
+
+def _insert_contacts(rows):
+    """Insere várias linhas (name, email, phone, notes) numa única transação.
+    Retorna (quantidade inserida, último id gerado)."""
+    conn = _conn()
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    if _in_bulk:
+        # Savepoint: um lote inválido é desfeito sem descartar o restante do modo lote.
+        conn.execute("SAVEPOINT insert_batch")
+    try:
+        cur = conn.executemany(INSERT_CONTACT_SQL, rows)
+        count = cur.rowcount
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        if _in_bulk:
+            conn.execute("RELEASE insert_batch")
+        _commit(conn)
+    except Exception:
+        # Lote inválido não pode ficar pendente para o próximo commit.
+        if _in_bulk:
+            conn.execute("ROLLBACK TO insert_batch")
+            conn.execute("RELEASE insert_batch")
+        else:
+            conn.rollback()
+        raise
+    finally:
+        _get_contact_cached.cache_clear()  # ids antes inexistentes podem estar em cache como None
+    return count, last_id
+
+def create_contacts(rows):
+    """Cadastro em lote: um único executemany + commit para todas as linhas."""
+    count, _ = _insert_contacts(rows)
+    if count >= ANALYZE_THRESHOLD:
+        _conn().execute("ANALYZE")
+    return count
+
 def create_contact(name, email=None, phone=None, notes=None):
-    conn = get_connection()
-    cur = conn.cursor()
-    created_at = datetime.utcnow().isoformat()
-    cur.execute("""
-        INSERT INTO contacts (name, email, phone, notes, created_at)
-        VALUES (?, ?, ?, ?, ?)
-    """, (name, email, phone, notes, created_at))
-    conn.commit()
-    new_id = cur.lastrowid
-    conn.close()
+    _, new_id = _insert_contacts([(name, email, phone, notes)])
     return new_id
 
 def list_contacts(limit=100):
-    conn = get_connection()
+    conn = _conn()
     cur = conn.cursor()
     cur.execute("SELECT id, name, email, phone, notes, created_at FROM contacts ORDER BY id DESC LIMIT ?", (limit,))
     rows = cur.fetchall()
-    conn.close()
     return rows
 
-def get_contact(contact_id):
-    conn = get_connection()
+@functools.lru_cache(maxsize=1024)
+def _get_contact_cached(contact_id):
+    conn = _conn()
     cur = conn.cursor()
     cur.execute("SELECT id, name, email, phone, notes, created_at FROM contacts WHERE id = ?", (contact_id,))
     row = cur.fetchone()
-    conn.close()
     return row
 
-def search_contacts(term):
+def get_contact(contact_id):
+    # Cache invalidado por qualquer escrita (create/update/delete).
+    return _get_contact_cached(contact_id)
+
+FTS_MIN_TERM = 3  # o tokenizer trigram só indexa termos com 3+ caracteres
+
+def _fts_query(term):
+    """Envolve o termo em aspas para neutralizar operadores do FTS5 (-, OR, NEAR...)."""
+    return '"' + term.replace('"', '""') + '"'
+
+def _search_like(cur, term):
+    """Busca original: LIKE '%termo%' nas quatro colunas (varre a tabela)."""
     term_like = f"%{term}%"
-    conn = get_connection()
-    cur = conn.cursor()
     cur.execute("""
         SELECT id, name, email, phone, notes, created_at
         FROM contacts
         WHERE name LIKE ? OR email LIKE ? OR phone LIKE ? OR notes LIKE ?
         ORDER BY id DESC
     """, (term_like, term_like, term_like, term_like))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
 
-def update_contact(contact_id, name=None, email=None, phone=None, notes=None):
-    # Build dynamic update
-    conn = get_connection()
+def search_contacts(term):
+    """Gera os contatos encontrados à medida que o SQLite os produz (sem fetchall)."""
+    conn = _conn()
     cur = conn.cursor()
-    updates = []
-    params = []
-    if name is not None:
-        updates.append("name = ?")
-        params.append(name)
-    if email is not None:
-        updates.append("email = ?")
-        params.append(email)
-    if phone is not None:
-        updates.append("phone = ?")
-        params.append(phone)
-    if notes is not None:
-        updates.append("notes = ?")
-        params.append(notes)
-
-    if not updates:
-        conn.close()
-        return False  # nothing to update
+    if _SEARCH_MODE == "blob":
+        # Sem lower() no Python: o LIKE já ignora caixa em ASCII, e o lower() do SQLite
+        # não mexe em letras acentuadas ("Álvaro" precisa casar com "Álvaro").
+        cur.execute("""
+            SELECT id, name, email, phone, notes, created_at
+            FROM contacts
+            WHERE search_blob LIKE ?
+            ORDER BY id DESC
+        """, (f"%{term}%",))
+        yield from cur
+        return
+    if _SEARCH_MODE == "like" or len(term) < FTS_MIN_TERM:
+        _search_like(cur, term)
+        yield from cur
+        return
+    cur.execute("""
+        SELECT c.id, c.name, c.email, c.phone, c.notes, c.created_at
+        FROM contacts c
+        JOIN contacts_fts ON contacts_fts.rowid = c.id
+        WHERE contacts_fts MATCH ?
+        ORDER BY c.id DESC
+    """, (_fts_query(term),))
+    yield from cur
 
-    params.append(contact_id)
-    sql = f"UPDATE contacts SET {', '.join(updates)} WHERE id = ?"
-    cur.execute(sql, params)
-    conn.commit()
-    affected = cur.rowcount
-    conn.close()
-    return affected > 0
+UPDATE_CONTACT_SQL = """
+    UPDATE contacts
+    SET name = COALESCE(?, name), email = COALESCE(?, email),
+        phone = COALESCE(?, phone), notes = COALESCE(?, notes)
+    WHERE id = ?
+"""
+
+def update_contact(contact_id, name=None, email=None, phone=None, notes=None):
+    # SQL fixo (None = manter valor atual) para reaproveitar o statement já compilado.
+    if name is None and email is None and phone is None and notes is None:
+        return False  # nothing to update
+    conn = _conn()
+    cur = conn.execute(UPDATE_CONTACT_SQL, (name, email, phone, notes, contact_id))
+    _commit(conn)
+    _get_contact_cached.cache_clear()
+    return cur.rowcount > 0
 
 def delete_contact(contact_id):
-    conn = get_connection()
+    conn = _conn()
     cur = conn.cursor()
     cur.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
-    conn.commit()
+    _commit(conn)
+    _get_contact_cached.cache_clear()
     affected = cur.rowcount
-    conn.close()
     return affected > 0
 
 # ---------- Export / Backup ----------
-def export_to_csv(csv_filename="contacts_export.csv"):
-    rows = list_contacts(limit=10000)
-    headers = ["id", "name", "email", "phone", "notes", "created_at"]
+EXPORT_BATCH_SIZE = 1000
+EXPORT_SQL = "SELECT id, name, email, phone, notes, created_at FROM contacts ORDER BY id DESC"
+EXPORT_HEADERS = ["id", "name", "email", "phone", "notes", "created_at"]
+
+def _export_to_csv_pandas(pd, csv_filename):
+    # to_csv serializa cada bloco em código compilado; chunksize mantém a memória constante.
+    # O parâmetro se chama 'lineterminator' a partir do pandas 1.5 ('line_terminator' antes).
+    major, minor = (int(part) for part in pd.__version__.split(".")[:2])
+    terminator_arg = "lineterminator" if (major, minor) >= (1, 5) else "line_terminator"
+    chunks = pd.read_sql_query(EXPORT_SQL, _conn(), chunksize=EXPORT_BATCH_SIZE)
     with open(csv_filename, mode="w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        writer.writerows(rows)
+        f.write(",".join(EXPORT_HEADERS) + "\r\n")
+        for chunk in chunks:
+            chunk.to_csv(f, header=False, index=False, **{terminator_arg: "\r\n"})
+    return csv_filename
+
+def _csv_writer_worker(csv_filename, batches, errors):
+    """Thread de escrita: consome lotes da fila até o sentinela None e fecha o arquivo."""
+    try:
+        with open(csv_filename, mode="w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_HEADERS)
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                writer.writerows(batch)
+    except Exception as e:  # repassado para a thread principal
+        errors.append(e)
+        while batches.get() is not None:  # drena a fila para não travar o produtor
+            pass
+
+def export_to_csv(csv_filename="contacts_export.csv"):
+    try:
+        import pandas as pd  # opcional e importado só aqui: não pesa na abertura do menu
+    except ImportError:
+        pd = None
+    if pd is not None:
+        return _export_to_csv_pandas(pd, csv_filename)
+    # Lê o cursor em lotes (sem limite de linhas); a escrita em disco roda numa thread
+    # separada para sobrepor o fetch do SQLite e o write do arquivo.
+    batches = queue.Queue(maxsize=4)
+    errors = []
+    worker = threading.Thread(target=_csv_writer_worker, args=(csv_filename, batches, errors))
+    worker.start()
+    try:
+        cur = _conn().cursor()
+        cur.arraysize = EXPORT_BATCH_SIZE
+        cur.execute(EXPORT_SQL)
+        while True:
+            batch = cur.fetchmany()
+            if not batch:
+                break
+            batches.put(batch)
+    finally:
+        batches.put(None)
+        worker.join()
+    if errors:
+        raise errors[0]
     return csv_filename
 
 def backup_db(backup_path=None):
     if backup_path is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_path = f"backup_{timestamp}.db"
-    # Ensure DB file exists
-    if not os.path.exists(DB_FILENAME):
-        raise FileNotFoundError("Arquivo do banco não encontrado para backup.")
-    shutil.copy2(DB_FILENAME, backup_path)
+    # API de backup online: snapshot consistente (inclui o conteúdo do WAL), copiado em blocos.
+    conn = _conn()
+    dst = sqlite3.connect(backup_path)
+    try:
+        if conn.in_transaction:
+            # Com uma transação aberta (ex.: modo lote) o backup na própria conexão não avança;
+            # uma conexão de leitura separada copia o último estado confirmado.
+            src = get_connection()
+            try:
+                src.backup(dst, pages=1000)
+            finally:
+                src.close()
+        else:
+            conn.backup(dst, pages=1000)
+    finally:
+        dst.close()
     return backup_path
 
 # ---------- Utilitários ----------
+def format_created_at(epoch_seconds):
+    """Converte o created_at (segundos UNIX) para ISO 8601 em UTC, só na exibição."""
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc).isoformat()
+
 def print_contact_row(row):
     if not row:
         print("Contato não encontrado.")
         return
-    print(f"ID: {row[0]}")
-    print(f"Nome: {row[1]}")
-    print(f"E-mail: {row[2]}")
-    print(f"Telefone: {row[3]}")
-    print(f"Notas: {row[4]}")
-    print(f"Criado em (UTC): {row[5]}")
+    print(f"ID: {row['id']}")
+    print(f"Nome: {row['name']}")
+    print(f"E-mail: {row['email']}")
+    print(f"Telefone: {row['phone']}")
+    print(f"Notas: {row['notes']}")
+    print(f"Criado em (UTC): {format_created_at(row['created_at'])}")
     print("-" * 30)
 
+def format_contact_rows(rows):
+    """Mesmo layout de print_contact_row, montado numa única string para escrita em lote."""
+    return "".join(
+        f"ID: {r['id']}\nNome: {r['name']}\nE-mail: {r['email']}\nTelefone: {r['phone']}\n"
+        f"Notas: {r['notes']}\nCriado em (UTC): {format_created_at(r['created_at'])}\n{'-' * 30}\n"
+        for r in rows
+    )
+
 def safe_input(prompt, default=None):
     try:
         value = input(prompt).strip()
@@ -161,9 +460,7 @@ def safe_input(prompt, default=None):
         return default
 
 # ---------- Menu interativo ----------
-def menu():
-    initialize_db()
-    menu_text = """
+MENU_TEXT = """
     ==== Sistema de Banco de Dados (SQLite) ====
     1) Criar novo contato
     2) Listar contatos
@@ -174,123 +471,159 @@ def menu():
     7) Exportar para CSV
     8) Fazer backup do banco
     9) Sair
+    B) Iniciar/finalizar (flush) modo lote
     ===========================================
     """
+_MENU_OUTPUT = MENU_TEXT + "\n"  # equivalente a print(MENU_TEXT), num único write
+
+PROMPT_CHOICE = "Escolha uma opção (1-9, B): "
+PROMPT_NAME = "Nome: "
+PROMPT_EMAIL = "E-mail (enter para vazio): "
+PROMPT_PHONE = "Telefone (enter para vazio): "
+PROMPT_NOTES = "Notas (enter para vazio): "
+
+def _cmd_create():
+    name = safe_input(PROMPT_NAME)
+    if not name:
+        print("Nome é obrigatório.")
+        return
+    email = safe_input(PROMPT_EMAIL, default=None)
+    phone = safe_input(PROMPT_PHONE, default=None)
+    notes = safe_input(PROMPT_NOTES, default=None)
+    new_id = create_contact(name, email, phone, notes)
+    print(f"Contato criado com ID {new_id}.")
+
+def _cmd_list():
+    limit_str = safe_input("Quantos listar? (enter para 100): ", default="100")
+    try:
+        limit = int(limit_str)
+    except ValueError:
+        limit = 100
+    rows = list_contacts(limit=limit)
+    if not rows:
+        print("Nenhum contato encontrado.")
+    else:
+        sys.stdout.write(format_contact_rows(rows))
+
+def _cmd_get():
+    id_str = safe_input("ID do contato: ")
+    try:
+        cid = int(id_str)
+    except (ValueError, TypeError):
+        print("ID inválido.")
+        return
+    row = get_contact(cid)
+    print_contact_row(row)
+
+def _cmd_search():
+    term = safe_input("Termo de pesquisa: ")
+    if not term:
+        print("Termo vazio.")
+        return
+    found = False
+    for r in search_contacts(term):
+        print_contact_row(r)
+        found = True
+    if not found:
+        print("Nenhum resultado.")
+
+def _cmd_update():
+    id_str = safe_input("ID do contato a atualizar: ")
+    try:
+        cid = int(id_str)
+    except (ValueError, TypeError):
+        print("ID inválido.")
+        return
+    existing = get_contact(cid)
+    if not existing:
+        print("Contato não existe.")
+        return
+    print("Deixe em branco para manter o valor atual.")
+    new_name = safe_input(f"Nome ({existing['name']}): ", default=None)
+    new_email = safe_input(f"E-mail ({existing['email']}): ", default=None)
+    new_phone = safe_input(f"Telefone ({existing['phone']}): ", default=None)
+    new_notes = safe_input(f"Notas ({existing['notes']}): ", default=None)
+
+    # Em branco -> não altera; valores iguais ao atual também são ignorados.
+    entered = {"name": new_name, "email": new_email, "phone": new_phone, "notes": new_notes}
+    changes = {
+        field: value for field, value in entered.items()
+        if value not in (None, "") and value != existing[field]
+    }
+    if not changes:
+        # Evita uma transação de escrita (e o fsync) quando nada mudou.
+        print("Nenhuma alteração.")
+        return
+    if update_contact(cid, **changes):
+        print("Contato atualizado com sucesso.")
+    else:
+        print("Nenhuma alteração aplicada.")
+
+def _cmd_delete():
+    id_str = safe_input("ID do contato a deletar: ")
+    try:
+        cid = int(id_str)
+    except (ValueError, TypeError):
+        print("ID inválido.")
+        return
+    confirm = safe_input(f"Confirma exclusão do contato {cid}? (s/N): ", default="n")
+    if confirm.lower() in ("s", "y", "sim", "yes"):
+        ok = delete_contact(cid)
+        if ok:
+            print("Contato deletado.")
+        else:
+            print("ID não encontrado, nada deletado.")
+    else:
+        print("Exclusão cancelada.")
+
+def _cmd_export():
+    fname = safe_input("Nome do arquivo CSV (enter para contacts_export.csv): ", default="contacts_export.csv")
+    path = export_to_csv(fname)
+    print(f"Exportado para {path}.")
+
+def _cmd_backup():
+    try:
+        backup_name = safe_input("Nome do arquivo de backup (enter para automático): ", default=None)
+        path = backup_db(backup_name if backup_name else None)
+        print(f"Backup criado: {path}")
+    except sqlite3.Error as e:
+        print("Erro:", e)
+
+def _cmd_bulk():
+    if _in_bulk:
+        flush_bulk()
+        print("Modo lote finalizado; alterações gravadas.")
+    else:
+        begin_bulk()
+        print("Modo lote iniciado; use B novamente para gravar (flush).")
+
+# Opção do menu -> comando. "9" (sair) é tratado no próprio loop.
+DISPATCH = {
+    "1": _cmd_create,
+    "2": _cmd_list,
+    "3": _cmd_get,
+    "4": _cmd_search,
+    "5": _cmd_update,
+    "6": _cmd_delete,
+    "7": _cmd_export,
+    "8": _cmd_backup,
+    "B": _cmd_bulk,
+    "b": _cmd_bulk,
+}
+
+def menu():
+    initialize_db()
     while True:
-        print(menu_text)
-        choice = safe_input("Escolha uma opção (1-9): ")
+        sys.stdout.write(_MENU_OUTPUT)
+        choice = safe_input(PROMPT_CHOICE)
         if not choice:
             continue
-        if choice == "1":
-            name = safe_input("Nome: ")
-            if not name:
-                print("Nome é obrigatório.")
-                continue
-            email = safe_input("E-mail (enter para vazio): ", default=None)
-            phone = safe_input("Telefone (enter para vazio): ", default=None)
-            notes = safe_input("Notas (enter para vazio): ", default=None)
-            new_id = create_contact(name, email, phone, notes)
-            print(f"Contato criado com ID {new_id}.")
-
-        elif choice == "2":
-            limit_str = safe_input("Quantos listar? (enter para 100): ", default="100")
-            try:
-                limit = int(limit_str)
-            except ValueError:
-                limit = 100
-            rows = list_contacts(limit=limit)
-            if not rows:
-                print("Nenhum contato encontrado.")
-            else:
-                for r in rows:
-                    print_contact_row(r)
-
-        elif choice == "3":
-            id_str = safe_input("ID do contato: ")
-            try:
-                cid = int(id_str)
-            except (ValueError, TypeError):
-                print("ID inválido.")
-                continue
-            row = get_contact(cid)
-            print_contact_row(row)
-
-        elif choice == "4":
-            term = safe_input("Termo de pesquisa: ")
-            if not term:
-                print("Termo vazio.")
-                continue
-            results = search_contacts(term)
-            if not results:
-                print("Nenhum resultado.")
-            else:
-                for r in results:
-                    print_contact_row(r)
-
-        elif choice == "5":
-            id_str = safe_input("ID do contato a atualizar: ")
-            try:
-                cid = int(id_str)
-            except (ValueError, TypeError):
-                print("ID inválido.")
-                continue
-            existing = get_contact(cid)
-            if not existing:
-                print("Contato não existe.")
-                continue
-            print("Deixe em branco para manter o valor atual.")
-            new_name = safe_input(f"Nome ({existing[1]}): ", default=None)
-            new_email = safe_input(f"E-mail ({existing[2]}): ", default=None)
-            new_phone = safe_input(f"Telefone ({existing[3]}): ", default=None)
-            new_notes = safe_input(f"Notas ({existing[4]}): ", default=None)
-
-            # Se o usuário deixou em branco (None) -> não altera.
-            changed = update_contact(
-                cid,
-                name=new_name if new_name != "" else None,
-                email=new_email if new_email != "" else None,
-                phone=new_phone if new_phone != "" else None,
-                notes=new_notes if new_notes != "" else None
-            )
-            if changed:
-                print("Contato atualizado com sucesso.")
-            else:
-                print("Nenhuma alteração aplicada.")
-
-        elif choice == "6":
-            id_str = safe_input("ID do contato a deletar: ")
-            try:
-                cid = int(id_str)
-            except (ValueError, TypeError):
-                print("ID inválido.")
-                continue
-            confirm = safe_input(f"Confirma exclusão do contato {cid}? (s/N): ", default="n")
-            if confirm.lower() in ("s", "y", "sim", "yes"):
-                ok = delete_contact(cid)
-                if ok:
-                    print("Contato deletado.")
-                else:
-                    print("ID não encontrado, nada deletado.")
-            else:
-                print("Exclusão cancelada.")
-
-        elif choice == "7":
-            fname = safe_input("Nome do arquivo CSV (enter para contacts_export.csv): ", default="contacts_export.csv")
-            path = export_to_csv(fname)
-            print(f"Exportado para {path}.")
-
-        elif choice == "8":
-            try:
-                backup_name = safe_input("Nome do arquivo de backup (enter para automático): ", default=None)
-                path = backup_db(backup_name if backup_name else None)
-                print(f"Backup criado: {path}")
-            except FileNotFoundError as e:
-                print("Erro:", e)
-
+        command = DISPATCH.get(choice)
+        if command is not None:
+            command()
         elif choice == "9":
             print("Saindo... Até mais!")
             break
-
         else:
             print("Opção inválida. Tente novamente.")
 